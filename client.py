@@ -0,0 +1,393 @@
+import asyncio
+import errno
+import random
+import time
+from clock_sync import ClockSync, monotonic_ms
+
+try:
+    # CircuitPython: sockets come from the Wi-Fi radio
+    import wifi
+    import socketpool
+except ImportError:
+    # CPython: use the standard socket module (e.g. for load tests on a PC)
+    wifi = None
+    import socket
+
+# Commands that describe the talk button state; only the latest one matters
+TALK_COMMANDS = ("TALKING", "STOPPED_TALKING")
+
+# Commands carrying Server timestamps; held back until the clock is synchronized
+TIMED_COMMANDS = ("START_GAME",)
+
+# Seconds to wait for a SYNC_REPLY before sending a new SYNC
+SYNC_TIMEOUT = 1.0
+
+# A jump in clock offset larger than this (ms) across a reconnect means the Server rebooted
+SERVER_REBOOT_MS = 1000
+
+# Errors raised by a non-blocking socket when no data can be read/written yet
+# (EWOULDBLOCK differs from EAGAIN on Windows)
+WOULD_BLOCK_ERRORS = (errno.EAGAIN, getattr(errno, "EWOULDBLOCK", errno.EAGAIN), errno.ETIMEDOUT)
+
+
+class Client:
+    def __init__(self, host="192.168.4.1", port=1235, on_command=None,
+                 min_backoff=0.5, max_backoff=10.0, connect_timeout=2.0,
+                 poll_interval=0.01, sync_interval=5.0, ssid=None, password=None):
+        """
+        Initialize the Client instance that talks to the paired room's Server.
+
+        Runs on both CircuitPython (needs the asyncio library from the
+        Adafruit bundle in lib/) and CPython.
+
+        Args:
+            host (str): IP address of the Server (the AP address by default).
+            port (int): TCP port the Server listens on.
+            on_command (callable): Called with each received command. When not
+                given, commands are queued for `async for cmd in client`.
+            min_backoff (float): First delay in seconds before reconnecting.
+            max_backoff (float): Largest delay in seconds between reconnects.
+            connect_timeout (float): Seconds a connection attempt may take. On
+                CircuitPython the connection attempt blocks the event loop.
+            poll_interval (float): Seconds to sleep between socket polls.
+            sync_interval (float): Seconds between clock sync requests once
+                the first few samples have been taken.
+            ssid (str): Wi-Fi SSID to join on CircuitPython (defaults to secrets.SSID).
+            password (str): Wi-Fi password on CircuitPython (defaults to secrets.PASSWORD).
+        """
+        self.host = host
+        self.port = port
+        self.on_command = on_command
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+        self.poll_interval = poll_interval
+        self.ssid = ssid
+        self.password = password
+
+        self.pool = None          # SocketPool (CircuitPython) or socket module (CPython)
+        self.conn = None          # Connected socket, None while disconnected
+        self.buffer = bytearray(1024)  # Buffer for receiving incoming data
+        self.partial = b""        # Received bytes that are not newline-terminated yet
+        self.running = False      # True while run() should keep going
+        self.closed = False       # True once close() has been called
+
+        self.outbox = []          # Commands waiting to be sent (talk state excluded)
+        self.max_outbox = 16      # Oldest commands are dropped beyond this
+        self.talking = False      # Latest requested talk state
+        self.talking_sent = None  # Talk state last sent to the Server (None = unknown)
+
+        self.inbox = []           # Received commands waiting for the async iterator
+        self.max_inbox = 32       # Oldest commands are dropped beyond this
+        self.inbox_event = asyncio.Event()
+
+        self.clock = ClockSync()  # Offset and skew to the Server's clock
+        self.sync_interval = sync_interval
+        self.last_sync = None     # Local time (s) the last SYNC was sent
+        self.next_sync = None     # Local time (s) the next SYNC is due
+        self.sync_in_flight = False  # True while waiting for a SYNC_REPLY
+        self.held = []            # Timed commands waiting for a clock sync (kept across reconnects)
+        self.last_offset = None   # Clock offset at the last sync, kept across reconnects
+
+    @property
+    def connected(self):
+        """
+        True while a connection to the Server is open.
+        """
+        return self.conn is not None
+
+    def send_command(self, cmd: str):
+        """
+        Queue a command string to send to the Server.
+        "TALKING" and "STOPPED_TALKING" are routed through set_talking()
+        so quick presses collapse into the latest state.
+
+        Args:
+            cmd (str): The command string to send.
+        """
+        if cmd in TALK_COMMANDS:
+            self.set_talking(cmd == "TALKING")
+            return
+        self.outbox.append(cmd)
+        if len(self.outbox) > self.max_outbox:
+            self.outbox.pop(0)
+
+    def set_talking(self, talking: bool):
+        """
+        Set the local talk state. Only the latest state is sent, and
+        nothing is sent if it matches what the Server already knows.
+
+        Args:
+            talking (bool): True while the local talk button is held.
+        """
+        self.talking = talking
+
+    async def run(self):
+        """
+        Keep a connection to the Server open, reconnecting with exponential
+        backoff (plus jitter) whenever it drops. Runs until close() is called.
+        """
+        self.running = True
+        self.closed = False
+        delay = self.min_backoff
+        while self.running:
+            try:
+                await self._connect()
+            except (OSError, asyncio.TimeoutError) as e:
+                print("[Client] Connect error:", e)
+                self._disconnect()
+                # Jitter keeps many load-test clients from reconnecting in lockstep
+                await asyncio.sleep(delay * (0.5 + random.random() / 2))
+                delay = min(delay * 2, self.max_backoff)
+                continue
+
+            connected_at = time.monotonic()
+            try:
+                await self._session()
+            except OSError as e:
+                print("[Client] Connection error:", e)
+            self._disconnect()
+            if not self.running:
+                break
+            if time.monotonic() - connected_at >= self.max_backoff:
+                delay = self.min_backoff  # Connection was stable: start again from the shortest delay
+            # Back off here too, so a Server that drops us right away is not hammered
+            await asyncio.sleep(delay * (0.5 + random.random() / 2))
+            delay = min(delay * 2, self.max_backoff)
+
+    def to_local(self, server_ms):
+        """
+        Convert a Server timestamp (e.g. from "START_GAME <start> <deadline>")
+        to this device's monotonic_ms() clock, for CountdownTimer.start().
+
+        "START_GAME" is only delivered once the clock is synchronized, so
+        converting its timestamps from on_command or `async for` always
+        gives a local time. Other callers must handle None.
+
+        Returns:
+            int or None: Local timestamp, or None before the first clock sync
+            (also right after a reconnect, as the Server may have rebooted).
+        """
+        if not self.clock.synchronized:
+            return None
+        return self.clock.to_local(server_ms)
+
+    def close(self):
+        """
+        Stop run(), close the connection and end `async for cmd in client`.
+        """
+        self.running = False
+        self.closed = True
+        self._disconnect()
+        self.inbox_event.set()  # Wake up __anext__ so it can stop
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """
+        Wait for the next received command (used when no on_command callback is set).
+        Stops once close() has been called and all queued commands are read.
+        """
+        while not self.inbox:
+            if self.closed:
+                raise StopAsyncIteration
+            self.inbox_event.clear()
+            await self.inbox_event.wait()
+        return self.inbox.pop(0)
+
+    async def _connect(self):
+        """
+        Join the Wi-Fi network if needed and open a TCP connection to the Server.
+        On CircuitPython this blocks for at most connect_timeout seconds; on
+        CPython the event loop keeps running so other clients are not stalled.
+        """
+        if not self.pool:
+            if wifi:
+                if not wifi.radio.connected:
+                    import secrets
+                    wifi.radio.connect(self.ssid or secrets.SSID, self.password or secrets.PASSWORD)
+                # Create a socket pool associated with the Wi-Fi radio
+                self.pool = socketpool.SocketPool(wifi.radio)
+            else:
+                self.pool = socket
+
+        self.conn = self.pool.socket(self.pool.AF_INET, self.pool.SOCK_STREAM)
+        if wifi:
+            self.conn.settimeout(self.connect_timeout)
+            self.conn.connect((self.host, self.port))
+        else:
+            self.conn.setblocking(False)
+            loop = asyncio.get_running_loop()
+            await asyncio.wait_for(loop.sock_connect(self.conn, (self.host, self.port)),
+                                   self.connect_timeout)
+        self.conn.setblocking(False)  # Non-blocking from here on, polled by _session()
+        self.partial = b""
+        self.talking_sent = None  # Server may have missed changes while disconnected
+        self.clock.reset()        # Server may have rebooted, so its clock changed
+        self.last_sync = None
+        self.sync_in_flight = False
+        print(f"[Client] Connected to {self.host}:{self.port}")
+
+    def _disconnect(self):
+        """
+        Close the connection socket if one is open.
+        """
+        if self.conn:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+            print("[Client] Disconnected")
+
+    async def _session(self):
+        """
+        Exchange commands with the Server until the connection drops.
+        """
+        while self.running and self.conn:
+            self._receive()
+            # close() may have been called from on_command or another task
+            # at any point, so check the connection again after every step
+            if not self.conn:
+                break
+            await self._sync()
+            if not self.conn:
+                break
+            await self._flush()
+            if not self.conn:
+                break
+            # Poll without delay while a SYNC_REPLY is expected, so its
+            # receive time (t4) is not late by up to poll_interval
+            await asyncio.sleep(0 if self.sync_in_flight else self.poll_interval)
+
+    def _receive(self):
+        """
+        Read available data and dispatch every complete command in it.
+        """
+        try:
+            n = self.conn.recv_into(self.buffer)
+        except OSError as e:
+            if e.errno in WOULD_BLOCK_ERRORS:
+                return  # Nothing to read yet
+            raise
+        if n == 0:
+            raise OSError("Server closed the connection")
+        received_at = monotonic_ms()
+
+        # Commands are newline-terminated; keep an unfinished tail for the next read
+        lines = (self.partial + bytes(self.buffer[:n])).split(b"\n")
+        self.partial = lines.pop()
+        for line in lines:
+            try:
+                cmd = line.decode().strip()
+            except UnicodeError:
+                print("[Client] Received invalid command, dropped")
+                continue
+            if cmd.startswith("SYNC_REPLY "):
+                self._sync_reply(cmd, received_at)
+            elif cmd:
+                self._dispatch(cmd)
+
+    async def _sync(self):
+        """
+        Send a clock sync request ("SYNC <t1>") when one is due. The first
+        few are sent quickly after connecting so the offset is known early.
+        """
+        now = time.monotonic()
+        if self.sync_in_flight:
+            if now - self.last_sync < SYNC_TIMEOUT:
+                return
+            self.sync_in_flight = False  # Reply was lost; stop polling without delay
+        if self.last_sync is not None and now < self.next_sync:
+            return
+
+        # Send at a random point within one poll, so requests do not always
+        # land at the same point of the Server's main loop and the
+        # lowest-delay sample has little waiting in it
+        await asyncio.sleep(random.random() * self.poll_interval)
+        self.last_sync = time.monotonic()
+        interval = self.sync_interval if len(self.clock.samples) >= 4 else 0.5
+        self.next_sync = self.last_sync + interval * (0.75 + random.random() / 2)
+        self.sync_in_flight = True
+        await self._send(f"SYNC {monotonic_ms()}", log=False)
+
+    def _sync_reply(self, cmd, received_at):
+        """
+        Add the round trip from a "SYNC_REPLY <t1> <t2> <t3>" to the clock estimate,
+        then deliver any timed commands that were waiting for it.
+        """
+        self.sync_in_flight = False
+        try:
+            t1, t2, t3 = [int(part) for part in cmd.split()[1:4]]
+        except ValueError:
+            print(f"[Client] Invalid sync reply: {cmd}")
+            return
+        self.clock.add_sample(t1, t2, t3, received_at)
+
+        # Held commands survive a reconnect, but their timestamps are
+        # meaningless if the Server rebooted in between
+        rebooted = (self.last_offset is not None
+                    and abs(self.clock.offset - self.last_offset) > SERVER_REBOOT_MS)
+        self.last_offset = self.clock.offset
+        held, self.held = self.held, []
+        for cmd in held:
+            if rebooted:
+                print(f"[Client] Server restarted, dropped: {cmd}")
+            else:
+                self._dispatch(cmd)
+
+    def _dispatch(self, cmd):
+        """
+        Hand a received command to the callback, or queue it for the async iterator.
+        Timed commands are held back until the clock is synchronized.
+        """
+        if not self.clock.synchronized and cmd.split()[0] in TIMED_COMMANDS:
+            self.held.append(cmd)
+            return
+        print(f"[Client] Received: {cmd}")
+        if self.on_command:
+            try:
+                self.on_command(cmd)
+            except Exception as e:
+                # A failing callback must not end run() and its reconnects
+                print("[Client] Command callback error:", e)
+            return
+        self.inbox.append(cmd)
+        if len(self.inbox) > self.max_inbox:
+            self.inbox.pop(0)
+        self.inbox_event.set()
+
+    async def _flush(self):
+        """
+        Send the latest talk state (if it changed) and all queued commands.
+        """
+        if self.talking != self.talking_sent:
+            talking = self.talking
+            await self._send(TALK_COMMANDS[0] if talking else TALK_COMMANDS[1])
+            self.talking_sent = talking
+
+        while self.outbox and self.conn:
+            await self._send(self.outbox[0])
+            self.outbox.pop(0)  # Only drop the command once it has been sent
+
+    async def _send(self, cmd, log=True):
+        """
+        Write one newline-terminated command, waiting while the socket is busy.
+        """
+        if log:
+            print(f"[Client] Sending: {cmd}")
+        data = (cmd + "\n").encode()
+        sent = 0
+        start = time.monotonic()
+        while sent < len(data):
+            if not self.conn:
+                raise OSError("Not connected")  # close() was called while waiting
+            try:
+                sent += self.conn.send(data[sent:])
+            except OSError as e:
+                if e.errno not in WOULD_BLOCK_ERRORS:
+                    raise
+                if time.monotonic() - start > self.connect_timeout:
+                    raise OSError("Send timed out")
+                await asyncio.sleep(self.poll_interval)
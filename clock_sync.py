@@ -0,0 +1,138 @@
+import time
+
+HISTORY_INTERVAL_MS = 60000   # Keep one offset estimate per minute for the skew fit
+MIN_SKEW_SPAN_MS = 600000     # Only fit a skew over at least ten minutes of history
+MAX_SKEW_RESIDUAL_MS = 3      # Only use the skew if the fit is this tight (RMS)
+MAX_SKEW = 100e-6             # Crystals drift less than 100 ppm; larger fits are noise
+
+
+def monotonic_ms():
+    """
+    Current monotonic time in whole milliseconds.
+    Uses integers so timestamps stay exact on CircuitPython, whose
+    floats lose millisecond precision after about an hour of uptime.
+    """
+    return time.monotonic_ns() // 1000000
+
+
+class ClockSync:
+    def __init__(self, max_samples=8, max_history=20):
+        """
+        NTP-style estimator of the offset and skew between the local clock
+        and a remote clock (the Server's monotonic_ms()).
+
+        Each round trip gives four timestamps:
+            t1: local time the request was sent
+            t2: remote time the request was received
+            t3: remote time the reply was sent
+            t4: local time the reply was received
+
+        The offset comes from recent round trips and is kept fresh by
+        re-syncing every few seconds. Skew is only applied once minutes of
+        history show a consistent drift, because over short spans the
+        measurement noise is far larger than any real crystal drift.
+
+        Args:
+            max_samples (int): Number of recent round trips to keep.
+            max_history (int): Number of per-minute offsets kept for the skew fit.
+        """
+        self.max_samples = max_samples
+        self.max_history = max_history
+        self.samples = []         # (local time, offset, round-trip delay) per round trip
+        self.history = []         # (local time, offset) at most one per HISTORY_INTERVAL_MS
+        self.offset = 0           # Remote minus local time (ms) at local time self.ref
+        self.ref = 0              # Local time (ms) the offset was measured at
+        self.skew = 0.0           # Change of offset per local millisecond
+        self.delay = None         # Round-trip delay (ms) of the sample the offset came from
+
+    @property
+    def synchronized(self):
+        """
+        True once at least one round trip has been measured.
+        """
+        return bool(self.samples)
+
+    def reset(self):
+        """
+        Forget all measurements, e.g. after reconnecting to a possibly rebooted Server.
+        """
+        self.samples = []
+        self.history = []
+        self.offset = 0
+        self.ref = 0
+        self.skew = 0.0
+        self.delay = None
+
+    def add_sample(self, t1, t2, t3, t4):
+        """
+        Add one round trip measurement and update the estimate.
+
+        Args:
+            t1, t2, t3, t4 (int): Timestamps in milliseconds (see class docstring).
+        """
+        offset = ((t2 - t1) + (t3 - t4)) // 2
+        delay = (t4 - t1) - (t3 - t2)
+        self.samples.append(((t1 + t4) // 2, offset, delay))
+        if len(self.samples) > self.max_samples:
+            self.samples.pop(0)
+        self._update()
+
+    def _update(self):
+        """
+        Recalculate offset and skew from the stored samples.
+        The sample with the shortest round trip gives the offset, because
+        queueing delays make the others less accurate.
+        """
+        best = min(self.samples, key=lambda s: s[2])
+        self.ref, self.offset, self.delay = best
+
+        if not self.history or self.ref - self.history[-1][0] >= HISTORY_INTERVAL_MS:
+            self.history.append((self.ref, self.offset))
+            if len(self.history) > self.max_history:
+                self.history.pop(0)
+            self.skew = self._fit_skew()
+
+    def _fit_skew(self):
+        """
+        Least squares slope of offset over local time in the history.
+
+        Returns:
+            float: The skew, or 0.0 when the history is too short or too noisy.
+        """
+        if len(self.history) < 5 or self.history[-1][0] - self.history[0][0] < MIN_SKEW_SPAN_MS:
+            return 0.0
+
+        # Work with differences to the first entry so the floats stay small
+        x0, y0 = self.history[0]
+        xs = [h[0] - x0 for h in self.history]
+        ys = [h[1] - y0 for h in self.history]
+        n = len(xs)
+        mean_x = sum(xs) / n
+        mean_y = sum(ys) / n
+        var = sum((x - mean_x) ** 2 for x in xs)
+        cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+        slope = cov / var
+
+        residual = sum((y - mean_y - slope * (x - mean_x)) ** 2 for x, y in zip(xs, ys))
+        if (residual / n) ** 0.5 > MAX_SKEW_RESIDUAL_MS:
+            return 0.0
+        return max(-MAX_SKEW, min(MAX_SKEW, slope))
+
+    def offset_at(self, local_ms):
+        """
+        Estimated remote minus local time (ms) at the given local time.
+        """
+        return self.offset + int(self.skew * (local_ms - self.ref))
+
+    def to_remote(self, local_ms):
+        """
+        Convert a local monotonic_ms() timestamp to remote time.
+        """
+        return local_ms + self.offset_at(local_ms)
+
+    def to_local(self, remote_ms):
+        """
+        Convert a remote monotonic_ms() timestamp to local time.
+        """
+        local_ms = remote_ms - self.offset
+        return remote_ms - self.offset_at(local_ms)
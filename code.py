@@ -5,6 +5,7 @@ import digitalio
 from server import Server
 from button_led import Button, RGBLed
 from led_ring import CountdownTimer
+from clock_sync import monotonic_ms
 from adafruit_pca9685 import PCA9685
 
 #time.sleep(3)  # Allow time for board to initialize
@@ -16,6 +17,7 @@ START_PRESS_THRESHOLD = 3     # Number of presses required to start the game
 TOTAL_TIME = 300              # Total countdown time in seconds
 MAX_FLASH_TIME_WINLOSE = 10   # Max time to flash LEDs when game is won or lost
 MAX_FLASH_TIME_NORMAL = 5     # Max time to flash LEDs for normal button feedback
+START_DELAY_MS = 1000         # Countdown starts this long after START_GAME is sent, so the other room receives it in time
 
 # --- Hardware and Game Setup ---
 
@@ -120,13 +122,17 @@ def reset_game():
 def start_game():
     """
     Begin the game: unlock buttons, start countdown, and notify clients.
+    The start and deadline are sent as absolute times on this device's clock,
+    which clients convert to their own clock using clock sync.
     """
     global game_started, buttons_locked
     print("Starting Game")
-    server.send_command("START_GAME")
+    start_time = monotonic_ms() + START_DELAY_MS
+    deadline = start_time + TOTAL_TIME * 1000
+    server.send_command(f"START_GAME {start_time} {deadline}")
     game_started = True
     buttons_locked = False
-    status_ring.start()
+    status_ring.start(start_time, deadline)
 
 def game_lost():
     """
@@ -175,6 +181,10 @@ while True:
     talk_button.update()  # Poll talk button hardware state
     incoming = server.poll()  # Check for incoming messages from client
 
+    # Answer clock sync requests ("SYNC <t1>") with the receive and send times
+    if incoming and incoming.startswith("SYNC "):
+        server.reply_sync(incoming[5:])
+
     # Update talk status based on incoming messages
     if incoming == "TALKING" and not talk_button_pressed:
         other_person_talking = True
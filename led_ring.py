@@ -2,6 +2,7 @@ import time
 import board
 import neopixel
 import math
+from clock_sync import monotonic_ms
 
 # Number of LEDs in the NeoPixel ring
 NUM_PIXELS = 16  # Adjust if using a different LED count
@@ -31,7 +32,8 @@ class CountdownTimer:
         self.red_color = (255, 0, 0)
         self.green_color = (0, 255, 0)
 
-        self.start_time = None  # Will store start time when countdown begins
+        self.start_time = None  # Will store start time (ms) when countdown begins
+        self.deadline = None  # Time (ms) at which the countdown finishes
         self.finished = False  # Indicates if countdown completed
 
         # Flashing animation controls
@@ -46,12 +48,23 @@ class CountdownTimer:
 
         self.clear()  # Initialize LEDs to off_color
 
-    def start(self):
-        """
-        Start the countdown timer by recording the current time.
-        Set all LEDs to the active color.
-        """
-        self.start_time = time.monotonic()
+    def start(self, start_time=None, deadline=None):
+        """
+        Start the countdown timer. Set all LEDs to the active color.
+        start_time: monotonic_ms() time the countdown starts (default now).
+            May lie in the future so both rooms start at the same instant.
+        deadline: monotonic_ms() time the countdown finishes
+            (default start_time + total_seconds).
+        """
+        if start_time is None:
+            start_time = monotonic_ms()
+        if deadline is None:
+            deadline = start_time + int(self.total_seconds * 1000)
+        # A deadline at or before the start (zero duration or a bad START_GAME)
+        # finishes right away instead of dividing by zero in update()
+        deadline = max(deadline, start_time + 1)
+        self.start_time = start_time
+        self.deadline = deadline
         self.finished = False
         self.flash_mode = False
         self.flash_count_done = 0
@@ -65,6 +78,7 @@ class CountdownTimer:
         Reset the countdown timer and turn off all LEDs.
         """
         self.start_time = None
+        self.deadline = None
         self.finished = False
         self.flash_mode = False
         self.flash_count_done = 0
@@ -87,9 +101,11 @@ class CountdownTimer:
             # Timer not started, do nothing
             return
 
-        elapsed = time.monotonic() - self.start_time
+        now = monotonic_ms()
+        # Before a (future) start time nothing has elapsed yet
+        elapsed = max(0, now - self.start_time)
         # Calculate how many LEDs should be turned off based on elapsed time
-        leds_to_turn_off = int((elapsed / self.total_seconds) * NUM_PIXELS)
+        leds_to_turn_off = elapsed * NUM_PIXELS // (self.deadline - self.start_time)
         leds_to_turn_off = min(leds_to_turn_off, NUM_PIXELS)
 
         # Set LED colors: red for time elapsed, active_color for remaining time
@@ -100,8 +116,8 @@ class CountdownTimer:
                 pixels[i] = self.active_color
         pixels.show()
 
-        # If all LEDs are off, countdown is finished and game is lost
-        if leds_to_turn_off == NUM_PIXELS:
+        # Once the deadline has passed, countdown is finished and game is lost
+        if now >= self.deadline:
             self.finished = True
             self.game_lost()
 
@@ -4,6 +4,9 @@ import time
 import select
 import microcontroller
 import secrets
+from clock_sync import monotonic_ms
+
+PARTIAL_TIMEOUT_MS = 100  # Time to wait for the rest of a command without a trailing newline
 
 class Server:
     def __init__(self, port=1235):
@@ -18,6 +21,9 @@ class Server:
         self.server = None        # The server socket that listens for connections
         self.conn = None          # The client connection socket (once accepted)
         self.buffer = bytearray(1024)  # Buffer for receiving incoming data
+        self.pending = []         # Commands received but not yet returned by poll()
+        self.partial = b""        # Received bytes that are not newline-terminated yet
+        self.received_at = None   # monotonic_ms() time the last data was received
 
     def start_ap(self):
         """
@@ -76,9 +82,18 @@ class Server:
         """
         Check if any data is available to read from the connected client.
         
+        Commands are separated by newlines. An unfinished command is kept
+        until the rest arrives. If nothing more arrives within
+        PARTIAL_TIMEOUT_MS it is treated as a complete command, so peers
+        that do not terminate their commands keep working. When several
+        commands arrive at once they are returned one per call.
+
         Returns:
-            str or None: Received string data if available, otherwise None.
+            str or None: Received command if available, otherwise None.
         """
+        if self.pending:
+            return self.pending.pop(0)  # Return commands left over from an earlier read
+
         if not self.conn:
             return None  # No active client connection
 
@@ -88,37 +103,84 @@ class Server:
             if self.conn in r:
                 # Receive data into buffer
                 n = self.conn.recv_into(self.buffer)
+                self.received_at = monotonic_ms()  # Also used to answer clock sync requests
                 if n == 0:
                     # Client disconnected gracefully
                     print("[Server] Client disconnected")
                     self.close()
                     return None
-                # Decode bytes to string, strip whitespace/newlines
-                data = self.buffer[:n].decode().strip()
-                print(f"[Server] Received: {data}")
-                return data
+                # Split into separate commands, keeping an unfinished tail for
+                # the next read. Lines are decoded one by one, so a character
+                # split across reads is decoded once complete.
+                lines = (self.partial + bytes(self.buffer[:n])).split(b"\n")
+                self.partial = lines.pop()
+                for line in lines:
+                    cmd = self._decode(line)
+                    if cmd:
+                        if not cmd.startswith("SYNC "):  # Clock sync traffic is too frequent to log
+                            print(f"[Server] Received: {cmd}")
+                        self.pending.append(cmd)
+                if self.pending:
+                    return self.pending.pop(0)
+            elif self.partial and monotonic_ms() - self.received_at >= PARTIAL_TIMEOUT_MS:
+                # No newline followed; treat the leftover bytes as a complete command
+                cmd = self._decode(self.partial)
+                self.partial = b""
+                if cmd:
+                    print(f"[Server] Received: {cmd}")
+                return cmd
         except Exception as e:
             # Any exception during polling - close connection and report
             print("[Server] Poll error:", e)
             self.close()
         return None
 
-    def send_command(self, cmd: str):
+    def _decode(self, line):
+        """
+        Decode one received line.
+
+        Returns:
+            str or None: The command without surrounding whitespace,
+            or None if the line is empty or not valid UTF-8.
+        """
+        try:
+            return line.decode().strip() or None
+        except UnicodeError:
+            print("[Server] Received invalid command, dropped")
+            return None
+
+    def send_command(self, cmd: str, log=True):
         """
         Send a command string to the connected client.
+        The command is terminated with a newline so the client can
+        tell consecutive commands apart.
         
         Args:
             cmd (str): The command string to send.
+            log (bool): Print the command over serial before sending.
         """
         if self.conn:
             try:
-                print(f"[Server] Sending: {cmd}")
-                self.conn.send(cmd.encode())  # Send encoded command bytes
+                if log:
+                    print(f"[Server] Sending: {cmd}")
+                self.conn.send((cmd + "\n").encode())  # Send newline-terminated command bytes
             except Exception as e:
                 # On send failure, close connection
                 print("[Server] Send error:", e)
                 self.close()
 
+    def reply_sync(self, t1):
+        """
+        Answer a clock sync request ("SYNC <t1>") with "SYNC_REPLY <t1> <t2> <t3>".
+        t2 is when the request was received and t3 is taken right before
+        sending. The reply is not logged, as printing over USB serial
+        would delay it after t3.
+
+        Args:
+            t1 (str): The client's send time, echoed back unchanged.
+        """
+        self.send_command(f"SYNC_REPLY {t1} {self.received_at} {monotonic_ms()}", log=False)
+
     def close(self):
         """
         Close the client connection and server socket safely.
@@ -129,6 +191,8 @@ class Server:
             except Exception:
                 pass
             self.conn = None
+        self.pending = []
+        self.partial = b""
 
         if self.server:
             try:
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live in the root of the CIRCUITPY drive, not in a package.
+# Appended so plain "pytest" finds them; see pytest.ini for why code.py
+# must not shadow the standard library.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,240 @@
+import asyncio
+import socket
+
+import client
+from client import Client
+from clock_sync import monotonic_ms
+
+
+def free_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+async def start_server(on_connect=None):
+    """
+    Local stand-in for the Server. Records the commands it receives
+    (except clock sync requests) and calls on_connect(writer) for each
+    connection.
+    """
+    received = []
+
+    async def handle(reader, writer):
+        if on_connect:
+            await on_connect(writer)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            cmd = line.decode().strip()
+            if not cmd.startswith("SYNC "):
+                received.append(cmd)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], received
+
+
+async def wait_for(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met in time")
+
+
+def test_talk_state_is_coalesced():
+    async def main():
+        server, port, received = await start_server()
+        cl = Client("127.0.0.1", port)
+        for talking in (True, False, True):
+            cl.set_talking(talking)
+        task = asyncio.create_task(cl.run())
+        await wait_for(lambda: received)
+        cl.send_command("STOPPED_TALKING")
+        cl.send_command("TALKING")
+        await asyncio.sleep(0.1)
+        cl.close()
+        await task
+        server.close()
+        return received
+
+    assert asyncio.run(main()) == ["TALKING"]
+
+
+def test_outbox_keeps_newest_commands():
+    async def main():
+        server, port, received = await start_server()
+        cl = Client("127.0.0.1", port)
+        cl.set_talking(False)
+        for i in range(20):
+            cl.send_command(f"CMD_{i}")
+        task = asyncio.create_task(cl.run())
+        await wait_for(lambda: len(received) >= 17)
+        cl.close()
+        await task
+        server.close()
+        return received
+
+    received = asyncio.run(main())
+    assert received[0] == "STOPPED_TALKING"
+    assert received[1:] == [f"CMD_{i}" for i in range(4, 20)]
+
+
+def test_command_split_across_reads():
+    async def send_split(writer):
+        writer.write(b"GAME_")
+        await writer.drain()
+        await asyncio.sleep(0.05)
+        writer.write(b"OVER\nRESET_GAME\n")
+        await writer.drain()
+
+    async def main():
+        server, port, _ = await start_server(send_split)
+        got = []
+        cl = Client("127.0.0.1", port, on_command=got.append)
+        task = asyncio.create_task(cl.run())
+        await wait_for(lambda: len(got) == 2)
+        cl.close()
+        await task
+        server.close()
+        return got
+
+    assert asyncio.run(main()) == ["GAME_OVER", "RESET_GAME"]
+
+
+def test_reconnect_backoff_doubles_up_to_max(monkeypatch):
+    monkeypatch.setattr(client.random, "random", lambda: 1.0)  # No jitter
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def main():
+        cl = Client("127.0.0.1", free_port(), min_backoff=0.5, max_backoff=2.0)
+
+        async def fake_sleep(seconds):
+            delays.append(seconds)
+            if len(delays) == 5:
+                cl.close()
+            await real_sleep(0)
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        await cl.run()
+
+    asyncio.run(main())
+    assert delays == [0.5, 1.0, 2.0, 2.0, 2.0]
+
+
+def test_close_ends_async_for():
+    async def main():
+        server, port, _ = await start_server()
+        cl = Client("127.0.0.1", port)
+        task = asyncio.create_task(cl.run())
+
+        async def consume():
+            return [cmd async for cmd in cl]
+
+        consumer = asyncio.create_task(consume())
+        await wait_for(lambda: cl.connected)
+        cl.close()
+        await task
+        server.close()
+        return await asyncio.wait_for(consumer, 1.0)
+
+    assert asyncio.run(main()) == []
+
+
+def test_close_from_callback_ends_run_cleanly():
+    async def send_reset(writer):
+        writer.write(b"RESET_GAME\n")
+        await writer.drain()
+
+    async def main():
+        server, port, _ = await start_server(send_reset)
+        cl = Client("127.0.0.1", port)
+
+        def on_command(cmd):
+            cl.set_talking(not cl.talking)  # Gives _flush() something to send
+            cl.close()
+
+        cl.on_command = on_command
+        await asyncio.wait_for(cl.run(), 2.0)  # Must return, not raise
+        server.close()
+        return cl
+
+    cl = asyncio.run(main())
+    assert not cl.connected
+
+
+async def start_sync_server(scripts):
+    """
+    Local stand-in for the Server that answers clock sync requests.
+    Each connection follows the next script (the last one repeats):
+    "send" is written right after connecting, "offset" (ms) is added to
+    this machine's clock in replies, and "replies" is how many SYNCs are
+    answered before the connection is closed (None: no limit).
+    """
+    connections = []
+
+    async def handle(reader, writer):
+        script = scripts[min(len(connections), len(scripts) - 1)]
+        connections.append(script)
+        writer.write(script["send"])
+        await writer.drain()
+        replies = 0
+        while True:
+            line = (await reader.readline()).decode()
+            if not line:
+                break
+            if line.startswith("SYNC "):
+                if replies == script["replies"]:
+                    break
+                now = monotonic_ms() + script["offset"]
+                writer.write(f"SYNC_REPLY {line[5:].strip()} {now} {now}\n".encode())
+                await writer.drain()
+                replies += 1
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], connections
+
+
+def run_held_start(scripts):
+    async def main():
+        server, port, connections = await start_sync_server(scripts)
+        got = []
+        cl = Client("127.0.0.1", port, on_command=got.append, min_backoff=0.05)
+        task = asyncio.create_task(cl.run())
+        await wait_for(lambda: len(connections) >= len(scripts) and cl.clock.synchronized)
+        await asyncio.sleep(0.05)
+        cl.close()
+        await task
+        server.close()
+        return got
+
+    return asyncio.run(main())
+
+
+def test_start_game_waits_for_first_sync():
+    got = run_held_start([{"send": b"START_GAME 100 200\n", "offset": 5000, "replies": None}])
+    assert got == ["START_GAME 100 200"]
+
+
+def test_held_start_game_survives_reconnect():
+    got = run_held_start([
+        {"send": b"", "offset": 5000, "replies": 1},
+        {"send": b"START_GAME 100 200\n", "offset": 5000, "replies": 0},
+        {"send": b"", "offset": 5000, "replies": None},
+    ])
+    assert got == ["START_GAME 100 200"]
+
+
+def test_held_start_game_dropped_after_server_restart():
+    got = run_held_start([
+        {"send": b"", "offset": 5000, "replies": 1},
+        {"send": b"START_GAME 100 200\n", "offset": 5000, "replies": 0},
+        {"send": b"", "offset": -100000, "replies": None},
+    ])
+    assert got == []
@@ -0,0 +1,77 @@
+import random
+
+from clock_sync import MAX_SKEW, ClockSync
+
+OFFSET = 5000000  # Remote clock runs this many ms ahead of the local clock
+
+
+def remote_time(local_ms, skew=0.0):
+    return OFFSET + int(local_ms * (1 + skew))
+
+
+def sync(clock, count, skew=0.0, jitter=0, interval=5000):
+    """
+    Feed `count` round trips, one every `interval` ms, with a 2 ms link each way
+    and up to `jitter` ms extra wait on the remote side.
+    Returns the local time after the last round trip.
+    """
+    t = 1000
+    for _ in range(count):
+        wait = random.uniform(0, jitter)
+        t1 = t
+        t2 = remote_time(t1 + 2 + wait, skew)
+        t3 = remote_time(t1 + 3 + wait, skew)
+        t4 = int(t1 + 5 + wait)
+        clock.add_sample(t1, t2, t3, t4)
+        t += interval
+    return t
+
+
+def test_not_synchronized_until_first_sample():
+    clock = ClockSync()
+    assert not clock.synchronized
+    clock.add_sample(0, OFFSET + 2, OFFSET + 3, 5)
+    assert clock.synchronized
+    clock.reset()
+    assert not clock.synchronized
+
+
+def test_offset_from_symmetric_round_trip():
+    clock = ClockSync()
+    now = sync(clock, 4)
+    assert clock.offset == OFFSET
+    assert clock.delay == 4
+    assert clock.to_local(remote_time(now)) == now
+    assert clock.to_remote(now) == remote_time(now)
+
+
+def test_offset_uses_lowest_delay_sample():
+    clock = ClockSync()
+    clock.add_sample(0, OFFSET + 40, OFFSET + 41, 45)  # Delayed on the way out
+    clock.add_sample(100, OFFSET + 102, OFFSET + 103, 105)
+    clock.add_sample(200, OFFSET + 202, OFFSET + 203, 235)  # Delayed on the way back
+    assert clock.offset == OFFSET
+    assert clock.delay == 4
+
+
+def test_no_skew_over_short_span():
+    random.seed(1)
+    clock = ClockSync()
+    sync(clock, 8, skew=30e-6, jitter=15)
+    assert clock.skew == 0.0
+
+
+def test_skew_applied_after_long_history():
+    clock = ClockSync()
+    now = sync(clock, 12 * 20, skew=30e-6)  # 20 minutes of syncs
+    assert abs(clock.skew - 30e-6) < 5e-6
+
+    # A deadline five minutes ahead converts to within a few milliseconds
+    deadline = now + 300000
+    assert abs(clock.to_local(remote_time(deadline, 30e-6)) - deadline) <= 3
+
+
+def test_skew_is_clamped():
+    clock = ClockSync()
+    sync(clock, 12 * 20, skew=500e-6)
+    assert clock.skew == MAX_SKEW
@@ -0,0 +1,91 @@
+import importlib
+import socket
+import sys
+import time
+import types
+
+import pytest
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """
+    A Server connected to one end of a socket pair; yields (server, peer).
+    The CircuitPython-only modules it imports are replaced by empty ones.
+    """
+    for name in ("wifi", "socketpool", "microcontroller"):
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.delitem(sys.modules, "server", raising=False)
+    server_module = importlib.import_module("server")
+
+    peer, conn = socket.socketpair()
+    conn.setblocking(False)
+    srv = server_module.Server()
+    srv.conn = conn
+    yield srv, peer
+    srv.close()
+    peer.close()
+
+
+def drain(srv):
+    commands = []
+    for _ in range(5):
+        cmd = srv.poll()
+        if cmd:
+            commands.append(cmd)
+    return commands
+
+
+def test_commands_are_returned_one_per_poll(server):
+    srv, peer = server
+    peer.send(b"TALKING\nSTOPPED_TALKING\n")
+    assert drain(srv) == ["TALKING", "STOPPED_TALKING"]
+
+
+def test_command_split_across_reads(server):
+    srv, peer = server
+    peer.send(b"TALK")
+    assert drain(srv) == []
+    peer.send(b"ING\nGAME_")
+    assert drain(srv) == ["TALKING"]
+    peer.send(b"WON\n")
+    assert drain(srv) == ["GAME_WON"]
+
+
+def test_character_split_across_reads(server):
+    srv, peer = server
+    data = "KAMER_É\n".encode()
+    peer.send(data[:-2])  # Ends halfway through the two-byte "É"
+    assert drain(srv) == []
+    peer.send(data[-2:])
+    assert drain(srv) == ["KAMER_É"]
+    assert srv.conn is not None
+
+
+def test_invalid_line_is_dropped(server):
+    srv, peer = server
+    peer.send(b"\xff\xfe\nGAME_WON\n")
+    assert drain(srv) == ["GAME_WON"]
+    assert srv.conn is not None
+
+
+def test_unterminated_command_after_timeout(server):
+    srv, peer = server
+    peer.send(b"RESET_GAME")
+    assert drain(srv) == []
+    time.sleep(0.15)
+    assert drain(srv) == ["RESET_GAME"]
+
+
+def test_reply_sync_is_not_logged(server, capsys):
+    srv, peer = server
+    peer.send(b"SYNC 1234\n")
+    assert drain(srv) == ["SYNC 1234"]
+    received_at = srv.received_at
+    srv.reply_sync("1234")
+
+    _, t1, t2, t3 = peer.recv(100).decode().split()
+    assert t1 == "1234"
+    assert int(t2) == received_at
+    assert int(t3) >= received_at
+    assert capsys.readouterr().out == ""